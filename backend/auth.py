@@ -5,7 +5,7 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from database import get_db, User
+from database import get_db, User, OPERATOR_INSTITUTION
 
 SECRET_KEY = "your-secret-key-here"
 ALGORITHM = "HS256"
@@ -52,12 +52,15 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = {"username": username}
+        token_data = {"username": username, "institution_id": payload.get("tenant")}
     except JWTError:
         raise credentials_exception
     user = get_user(db, username=token_data["username"])
     if user is None:
         raise credentials_exception
+    # Reject tokens issued for a different institution than the user now belongs to
+    if token_data["institution_id"] != user.institution_id:
+        raise credentials_exception
     return user
 
 async def get_current_admin_user(current_user: User = Depends(get_current_user)):
@@ -67,3 +70,11 @@ async def get_current_admin_user(current_user: User = Depends(get_current_user))
             detail="Not enough permissions"
         )
     return current_user
+
+async def get_current_operator_user(current_user: User = Depends(get_current_admin_user)):
+    if current_user.institution_id != OPERATOR_INSTITUTION:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
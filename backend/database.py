@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text, text
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Index, inspect, literal, text
 import os
 import time
 from sqlalchemy.ext.declarative import declarative_base
@@ -13,6 +13,25 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Institution assigned to rows that predate multi-tenancy or register without one
+DEFAULT_INSTITUTION = os.getenv("DEFAULT_INSTITUTION", "default")
+# Admins of this institution manage all institutions; nobody self-registers into it
+OPERATOR_INSTITUTION = os.getenv("OPERATOR_INSTITUTION", "operator")
+
+def parse_institutions(raw: str) -> dict:
+    """Parse "school_a:CODE_A,school_b:CODE_B" into {institution_id: registration_code}."""
+    institutions = {}
+    for entry in raw.split(","):
+        institution_id, _, code = entry.partition(":")
+        institution_id, code = institution_id.strip(), code.strip()
+        if institution_id:
+            institutions[institution_id] = code
+    return institutions
+
+# Schools served by this deployment and the codes students use to register into them
+INSTITUTION_REGISTRATION_CODES = parse_institutions(os.getenv("INSTITUTIONS", ""))
+KNOWN_INSTITUTIONS = {DEFAULT_INSTITUTION, OPERATOR_INSTITUTION, *INSTITUTION_REGISTRATION_CODES}
+
 class User(Base):
     __tablename__ = "users"
     
@@ -21,10 +40,15 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_admin = Column(Boolean, default=False)
+    institution_id = Column(String, nullable=False, default=DEFAULT_INSTITUTION, server_default=DEFAULT_INSTITUTION)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     responses = relationship("Response", back_populates="user")
 
+    __table_args__ = (
+        Index("ix_users_institution_id_id", "institution_id", "id"),
+    )
+
 class Question(Base):
     __tablename__ = "questions"
     
@@ -40,11 +64,16 @@ class Response(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     answer = Column(Integer, nullable=False)  # 1-5 scale
+    institution_id = Column(String, nullable=False, default=DEFAULT_INSTITUTION, server_default=DEFAULT_INSTITUTION)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="responses")
     question = relationship("Question")
 
+    __table_args__ = (
+        Index("ix_responses_institution_id_user_id", "institution_id", "user_id"),
+    )
+
 class LearningStyleResult(Base):
     __tablename__ = "learning_style_results"
     
@@ -55,11 +84,16 @@ class LearningStyleResult(Base):
     reading_score = Column(Integer, default=0)
     kinesthetic_score = Column(Integer, default=0)
     dominant_style = Column(String, nullable=False)
+    institution_id = Column(String, nullable=False, default=DEFAULT_INSTITUTION, server_default=DEFAULT_INSTITUTION)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_learning_style_results_institution_id_user_id", "institution_id", "user_id"),
+    )
+
 def wait_for_db(max_attempts: int = 30, delay_seconds: float = 1.0) -> None:
     """Block until the database is ready to accept connections."""
     attempts = 0
@@ -76,9 +110,33 @@ def wait_for_db(max_attempts: int = 30, delay_seconds: float = 1.0) -> None:
         conn.execute(text("SELECT 1"))
 
 
+def add_tenant_columns():
+    """Add institution columns and indexes to tables created before multi-tenancy."""
+    inspector = inspect(engine)
+    tenant_tables = [
+        table
+        for table in [User.__table__, Response.__table__, LearningStyleResult.__table__]
+        if "institution_id" not in {c["name"] for c in inspector.get_columns(table.name)}
+    ]
+    if not tenant_tables:
+        return
+    default_sql = literal(DEFAULT_INSTITUTION).compile(
+        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    with engine.begin() as conn:
+        for table in tenant_tables:
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN institution_id VARCHAR "
+                f"NOT NULL DEFAULT {default_sql}"
+            ))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
 def create_tables():
     wait_for_db()
     Base.metadata.create_all(bind=engine)
+    add_tenant_columns()
 
 def get_db():
     db = SessionLocal()
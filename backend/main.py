@@ -2,9 +2,21 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from datetime import timedelta
+import os
 from typing import List
 
-from database import get_db, create_tables, User, Question, Response, LearningStyleResult
+from database import (
+    get_db,
+    create_tables,
+    User,
+    Question,
+    Response,
+    LearningStyleResult,
+    DEFAULT_INSTITUTION,
+    OPERATOR_INSTITUTION,
+    INSTITUTION_REGISTRATION_CODES,
+    KNOWN_INSTITUTIONS,
+)
 from models import (
     UserCreate,
     UserLogin,
@@ -15,9 +27,11 @@ from models import (
     LearningStyleResult as LearningStyleResultModel,
     ResponseWithQuestion,
     ChangePasswordRequest,
+    AdminUserCreate,
+    InstitutionAssignment,
     Token,
 )
-from auth import authenticate_user, create_access_token, get_current_user, get_current_admin_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+from auth import authenticate_user, create_access_token, get_current_user, get_current_admin_user, get_current_operator_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
 
 app = FastAPI(title="Learning Style Questionnaire API")
 
@@ -173,10 +187,27 @@ async def startup_event():
             email="admin@example.com",
             username="admin",
             hashed_password=get_password_hash("admin"),
-            is_admin=True
+            is_admin=True,
+            institution_id=DEFAULT_INSTITUTION
         )
         db.add(admin_user)
         db.commit()
+
+    # Optional operator admin who provisions schools, configured via environment
+    operator_username = os.getenv("OPERATOR_ADMIN_USERNAME")
+    operator_password = os.getenv("OPERATOR_ADMIN_PASSWORD")
+    if operator_username and operator_password:
+        operator_user = db.query(User).filter(User.username == operator_username).first()
+        if not operator_user:
+            operator_user = User(
+                email=os.getenv("OPERATOR_ADMIN_EMAIL", f"{operator_username}@example.com"),
+                username=operator_username,
+                hashed_password=get_password_hash(operator_password),
+                is_admin=True,
+                institution_id=OPERATOR_INSTITUTION
+            )
+            db.add(operator_user)
+            db.commit()
     db.close()
     # Refresh translations on startup too
     load_translations()
@@ -192,13 +223,25 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
+    # Resolve the school from its registration code; without one, use the default institution
+    institution_id = DEFAULT_INSTITUTION
+    if user.registration_code:
+        matches = [
+            inst for inst, code in INSTITUTION_REGISTRATION_CODES.items()
+            if code and code == user.registration_code.strip()
+        ]
+        if not matches:
+            raise HTTPException(status_code=400, detail="Invalid registration code")
+        institution_id = matches[0]
+    
     # Create new user
     hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password,
-        is_admin=False
+        is_admin=False,
+        institution_id=institution_id
     )
     db.add(db_user)
     db.commit()
@@ -216,7 +259,7 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "tenant": user.institution_id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -249,7 +292,8 @@ def submit_responses(
         db_response = Response(
             user_id=current_user.id,
             question_id=response.question_id,
-            answer=response.answer
+            answer=response.answer,
+            institution_id=current_user.institution_id
         )
         db.add(db_response)
         new_responses.append(db_response)
@@ -257,11 +301,11 @@ def submit_responses(
     db.commit()
     
     # Calculate learning style scores
-    calculate_learning_style(current_user.id, db)
+    calculate_learning_style(current_user.id, db, current_user.institution_id)
     
     return new_responses
 
-def calculate_learning_style(user_id: int, db: Session):
+def calculate_learning_style(user_id: int, db: Session, institution_id: str):
     # Get all responses for the user
     responses = db.query(Response).filter(Response.user_id == user_id).all()
     
@@ -288,6 +332,7 @@ def calculate_learning_style(user_id: int, db: Session):
         existing_result.reading_score = scores["theorist"]
         existing_result.kinesthetic_score = scores["pragmatist"]
         existing_result.dominant_style = dominant_style
+        existing_result.institution_id = institution_id
     else:
         # Create new result
         result = LearningStyleResult(
@@ -296,7 +341,8 @@ def calculate_learning_style(user_id: int, db: Session):
             auditory_score=scores["reflector"],
             reading_score=scores["theorist"],
             kinesthetic_score=scores["pragmatist"],
-            dominant_style=dominant_style
+            dominant_style=dominant_style,
+            institution_id=institution_id
         )
         db.add(result)
     
@@ -311,14 +357,78 @@ def get_my_result(current_user: User = Depends(get_current_user), db: Session =
 
 @app.get("/admin/all-results", response_model=List[LearningStyleResultModel])
 def get_all_results(current_user: User = Depends(get_current_admin_user), db: Session = Depends(get_db)):
-    results = db.query(LearningStyleResult).all()
+    results = (
+        db.query(LearningStyleResult)
+        .filter(LearningStyleResult.institution_id == current_user.institution_id)
+        .all()
+    )
     return results
 
 @app.get("/admin/users", response_model=List[UserModel])
 def get_all_users(current_user: User = Depends(get_current_admin_user), db: Session = Depends(get_db)):
-    users = db.query(User).all()
+    users = db.query(User).filter(User.institution_id == current_user.institution_id).all()
     return users
 
+# Admin: create a user (optionally another admin) in the caller's institution.
+# Only operator admins may provision users for other institutions.
+@app.post("/admin/users", response_model=UserModel)
+def create_institution_user(
+    user: AdminUserCreate,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    institution_id = user.institution_id or current_user.institution_id
+    if institution_id != current_user.institution_id and current_user.institution_id != OPERATOR_INSTITUTION:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if institution_id not in KNOWN_INSTITUTIONS:
+        raise HTTPException(status_code=400, detail="Unknown institution")
+
+    db_user = db.query(User).filter(User.username == user.username).first()
+    if db_user:
+        raise HTTPException(status_code=400, detail="Username already registered")
+
+    db_user = db.query(User).filter(User.email == user.email).first()
+    if db_user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    db_user = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=get_password_hash(user.password),
+        is_admin=user.is_admin,
+        institution_id=institution_id
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+# Operator: move a user and their responses and results to another institution
+@app.put("/admin/users/{user_id}/institution", response_model=UserModel)
+def reassign_user_institution(
+    user_id: int,
+    payload: InstitutionAssignment,
+    current_user: User = Depends(get_current_operator_user),
+    db: Session = Depends(get_db),
+):
+    if payload.institution_id not in KNOWN_INSTITUTIONS:
+        raise HTTPException(status_code=400, detail="Unknown institution")
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user.institution_id = payload.institution_id
+    db.query(Response).filter(Response.user_id == user_id).update(
+        {Response.institution_id: payload.institution_id}, synchronize_session=False
+    )
+    db.query(LearningStyleResult).filter(LearningStyleResult.user_id == user_id).update(
+        {LearningStyleResult.institution_id: payload.institution_id}, synchronize_session=False
+    )
+    db.commit()
+    db.refresh(user)
+    return user
+
 @app.get("/me", response_model=UserModel)
 def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
@@ -333,7 +443,7 @@ def get_user_responses(
     records = (
         db.query(Response, Question)
         .join(Question, Question.id == Response.question_id)
-        .filter(Response.user_id == user_id)
+        .filter(Response.institution_id == current_user.institution_id, Response.user_id == user_id)
         .order_by(Response.question_id.asc())
         .all()
     )
@@ -376,7 +486,12 @@ def export_results_csv(
     import csv
     import io
 
-    results = db.query(LearningStyleResult).all()
+    records = (
+        db.query(LearningStyleResult, User)
+        .outerjoin(User, User.id == LearningStyleResult.user_id)
+        .filter(LearningStyleResult.institution_id == current_user.institution_id)
+        .all()
+    )
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow([
@@ -390,8 +505,7 @@ def export_results_csv(
         "dominant_style",
         "created_at",
     ])
-    for r in results:
-        user = db.query(User).filter(User.id == r.user_id).first()
+    for (r, user) in records:
         writer.writerow([
             r.user_id,
             user.username if user else "",
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -6,8 +6,38 @@ class UserBase(BaseModel):
     email: EmailStr
     username: str
 
+MAX_INSTITUTION_ID_LENGTH = 64
+
+def validate_institution_id(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return value
+    value = value.strip()
+    if not value or len(value) > MAX_INSTITUTION_ID_LENGTH:
+        raise ValueError(f"institution_id must be 1-{MAX_INSTITUTION_ID_LENGTH} characters")
+    return value
+
 class UserCreate(UserBase):
     password: str
+    registration_code: Optional[str] = None
+
+# Admin-provisioned account; institution_id defaults to the caller's institution
+class AdminUserCreate(UserBase):
+    password: str
+    is_admin: bool = False
+    institution_id: Optional[str] = None
+
+    @field_validator("institution_id")
+    @classmethod
+    def check_institution_id(cls, value):
+        return validate_institution_id(value)
+
+class InstitutionAssignment(BaseModel):
+    institution_id: str
+
+    @field_validator("institution_id")
+    @classmethod
+    def check_institution_id(cls, value):
+        return validate_institution_id(value)
 
 class UserLogin(BaseModel):
     username: str
@@ -16,6 +46,7 @@ class UserLogin(BaseModel):
 class User(UserBase):
     id: int
     is_admin: bool
+    institution_id: str
     created_at: datetime
     
     class Config: